@@ -308,6 +308,7 @@ def generate_targets(repo_path, deps_map):
                     extra_compiler_flags=json.dumps(deps["extra_compiler_flags"]),
                 )
     TARGETS.export_file("tools/db_crashtest.py")
+    TARGETS.write()
 
     print(ColorString.info("Generated TARGETS Summary:"))
     print(ColorString.info("- %d libs" % TARGETS.total_lib))
@@ -26,11 +26,8 @@ def pretty_list(lst, indent=8):
 class TARGETSBuilder:
     def __init__(self, path, extra_argv):
         self.path = path
-        header = targets_cfg.rocksdb_target_header_template.format(
-            extra_argv=extra_argv
-        )
-        with open(path, "wb") as targets_file:
-            targets_file.write(header.encode("utf-8"))
+        # rendered blocks are collected here and written out once by write()
+        self.parts = [targets_cfg.render_rocksdb_target_header(extra_argv=extra_argv)]
         self.total_lib = 0
         self.total_bin = 0
         self.total_test = 0
@@ -49,33 +46,28 @@ class TARGETSBuilder:
     ):
         if headers is not None:
             headers = "[" + pretty_list(headers) + "]"
-        with open(self.path, "ab") as targets_file:
-            targets_file.write(
-                targets_cfg.library_template.format(
-                    name=name,
-                    srcs=pretty_list(srcs),
-                    headers=headers,
-                    deps=pretty_list(deps),
-                    extra_external_deps=extra_external_deps,
-                    link_whole=link_whole,
-                    external_dependencies=pretty_list(external_dependencies),
-                    extra_test_libs=extra_test_libs,
-                ).encode("utf-8")
+        self.parts.append(
+            targets_cfg.render_library(
+                name=name,
+                srcs=pretty_list(srcs),
+                headers=headers,
+                deps=pretty_list(deps),
+                link_whole=link_whole,
+                extra_test_libs=extra_test_libs,
             )
+        )
         self.total_lib = self.total_lib + 1
 
     def add_rocksdb_library(self, name, srcs, headers=None, external_dependencies=None):
         if headers is not None:
             headers = "[" + pretty_list(headers) + "]"
-        with open(self.path, "ab") as targets_file:
-            targets_file.write(
-                targets_cfg.rocksdb_library_template.format(
-                    name=name,
-                    srcs=pretty_list(srcs),
-                    headers=headers,
-                    external_dependencies=pretty_list(external_dependencies),
-                ).encode("utf-8")
+        self.parts.append(
+            targets_cfg.render_rocksdb_library(
+                name=name,
+                srcs=pretty_list(srcs),
+                headers=headers,
             )
+        )
         self.total_lib = self.total_lib + 1
 
     def add_binary(
@@ -86,35 +78,32 @@ class TARGETSBuilder:
         extra_preprocessor_flags=None,
         extra_bench_libs=False,
     ):
-        with open(self.path, "ab") as targets_file:
-            targets_file.write(
-                targets_cfg.binary_template.format(
-                    name=name,
-                    srcs=pretty_list(srcs),
-                    deps=pretty_list(deps),
-                    extra_preprocessor_flags=pretty_list(extra_preprocessor_flags),
-                    extra_bench_libs=extra_bench_libs,
-                ).encode("utf-8")
+        self.parts.append(
+            targets_cfg.render_binary(
+                name=name,
+                srcs=pretty_list(srcs),
+                deps=pretty_list(deps),
+                extra_preprocessor_flags=pretty_list(extra_preprocessor_flags),
+                extra_bench_libs=extra_bench_libs,
             )
+        )
         self.total_bin = self.total_bin + 1
 
     def add_c_test(self):
-        with open(self.path, "ab") as targets_file:
-            targets_file.write(
-                b"""
+        self.parts.append(
+            """
 add_c_test_wrapper()
 """
-            )
+        )
 
     def add_test_header(self):
-        with open(self.path, "ab") as targets_file:
-            targets_file.write(
-                b"""
+        self.parts.append(
+            """
         # Generate a test rule for each entry in ROCKS_TESTS
         # Do not build the tests in opt mode, since SyncPoint and other test code
         # will not be included.
 """
-            )
+        )
 
     def add_fancy_bench_config(
         self,
@@ -125,32 +114,31 @@ add_c_test_wrapper()
         sl_iterations,
         regression_threshold,
     ):
-        with open(self.path, "ab") as targets_file:
-            targets_file.write(
-                targets_cfg.fancy_bench_template.format(
-                    name=name,
-                    bench_config=pprint.pformat(bench_config),
-                    slow=slow,
-                    expected_runtime=expected_runtime,
-                    sl_iterations=sl_iterations,
-                    regression_threshold=regression_threshold,
-                ).encode("utf-8")
+        self.parts.append(
+            targets_cfg.render_fancy_bench(
+                name=name,
+                bench_config=pprint.pformat(bench_config),
+                slow=slow,
+                expected_runtime=expected_runtime,
+                sl_iterations=sl_iterations,
+                regression_threshold=regression_threshold,
             )
+        )
 
     def register_test(self, test_name, src, deps, extra_compiler_flags):
-        with open(self.path, "ab") as targets_file:
-            targets_file.write(
-                targets_cfg.unittests_template.format(
-                    test_name=test_name,
-                    test_cc=str(src),
-                    deps=deps,
-                    extra_compiler_flags=extra_compiler_flags,
-                ).encode("utf-8")
+        self.parts.append(
+            targets_cfg.render_unittests(
+                test_name=test_name,
+                test_cc=str(src),
+                deps=deps,
+                extra_compiler_flags=extra_compiler_flags,
             )
+        )
         self.total_test = self.total_test + 1
 
     def export_file(self, name):
-        with open(self.path, "a") as targets_file:
-            targets_file.write(
-                targets_cfg.export_file_template.format(name=name)
-            )
+        self.parts.append(targets_cfg.render_export_file(name=name))
+
+    def write(self):
+        with open(self.path, "wb") as targets_file:
+            targets_file.write("".join(self.parts).encode("utf-8"))
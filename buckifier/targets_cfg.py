@@ -1,7 +1,12 @@
 # Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-rocksdb_target_header_template = """# This file \100generated by:
+# Each target is rendered by a plain f-string function rather than a
+# str.format() template, so the format string is not re-parsed per target.
+
+
+def render_rocksdb_target_header(extra_argv):
+    return f"""# This file \100generated by:
 #$ python3 buckifier/buckify_rocksdb.py{extra_argv}
 # --> DO NOT EDIT MANUALLY <--
 # This file is a Facebook-specific integration for buck builds, so can
@@ -12,21 +17,27 @@ load("@fbcode_macros//build_defs:export_files.bzl", "export_file")
 """
 
 
-library_template = """
+def render_library(name, srcs, deps, headers, link_whole, extra_test_libs):
+    return f"""
 cpp_library_wrapper(name="{name}", srcs=[{srcs}], deps=[{deps}], headers={headers}, link_whole={link_whole}, extra_test_libs={extra_test_libs})
 """
 
-rocksdb_library_template = """
+
+def render_rocksdb_library(name, srcs, headers):
+    return f"""
 rocks_cpp_library_wrapper(name="{name}", srcs=[{srcs}], headers={headers})
 
 """
 
 
-binary_template = """
+def render_binary(name, srcs, deps, extra_preprocessor_flags, extra_bench_libs):
+    return f"""
 cpp_binary_wrapper(name="{name}", srcs=[{srcs}], deps=[{deps}], extra_preprocessor_flags=[{extra_preprocessor_flags}], extra_bench_libs={extra_bench_libs})
 """
 
-unittests_template = """
+
+def render_unittests(test_name, test_cc, deps, extra_compiler_flags):
+    return f"""
 cpp_unittest_wrapper(name="{test_name}",
             srcs=["{test_cc}"],
             deps={deps},
@@ -34,11 +45,17 @@ cpp_unittest_wrapper(name="{test_name}",
 
 """
 
-fancy_bench_template = """
+
+def render_fancy_bench(
+    name, bench_config, slow, expected_runtime, sl_iterations, regression_threshold
+):
+    return f"""
 fancy_bench_wrapper(suite_name="{name}", binary_to_bench_to_metric_list_map={bench_config}, slow={slow}, expected_runtime={expected_runtime}, sl_iterations={sl_iterations}, regression_threshold={regression_threshold})
 
 """
 
-export_file_template = """
+
+def render_export_file(name):
+    return f"""
 export_file(name = "{name}")
 """
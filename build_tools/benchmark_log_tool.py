@@ -177,17 +177,17 @@ def push_report_to_opensearch(report, esdocument):
     logging.debug(
         f"upload {len(sanitized)} sane of {len(report)} benchmarks to opensearch"
     )
-    for single_benchmark in sanitized:
-        logging.debug(f"upload benchmark: {single_benchmark}")
-        response = requests.post(
-            esdocument,
-            json=single_benchmark,
-            auth=(os.environ["ES_USER"], os.environ["ES_PASS"]),
-        )
-        logging.debug(
-            f"Sent to OpenSearch, status: {response.status_code}, result: {response.text}"
-        )
-        response.raise_for_status()
+    # One session for the whole upload so the TLS connection is kept alive
+    # and reused across benchmarks.
+    with requests.Session() as session:
+        session.auth = (os.environ["ES_USER"], os.environ["ES_PASS"])
+        for single_benchmark in sanitized:
+            logging.debug(f"upload benchmark: {single_benchmark}")
+            response = session.post(esdocument, json=single_benchmark)
+            logging.debug(
+                f"Sent to OpenSearch, status: {response.status_code}, result: {response.text}"
+            )
+            response.raise_for_status()
 
 
 def push_report_to_null(report):
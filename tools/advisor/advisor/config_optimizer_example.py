@@ -4,23 +4,25 @@
 #  (found in the LICENSE.Apache file in the root directory).
 
 import argparse
-
-from advisor.db_config_optimizer import ConfigOptimizer
-from advisor.db_log_parser import NO_COL_FAMILY
-from advisor.db_options_parser import DatabaseOptions
-from advisor.rule_parser import RulesSpec
+import importlib
 
 
 CONFIG_OPT_NUM_ITER = 10
 
 
 def main(args):
+    # the advisor modules are imported only once the arguments have been
+    # parsed, so that '--help' and argument errors return without paying for
+    # them
+    from advisor.db_config_optimizer import ConfigOptimizer
+    from advisor.db_log_parser import NO_COL_FAMILY
+    from advisor.db_options_parser import DatabaseOptions
+    from advisor.rule_parser import RulesSpec
+
     # initialise the RulesSpec parser
     rule_spec_parser = RulesSpec(args.rules_spec)
     # initialise the benchmark runner
-    bench_runner_module = __import__(
-        args.benchrunner_module, fromlist=[args.benchrunner_class]
-    )
+    bench_runner_module = importlib.import_module(args.benchrunner_module)
     bench_runner_class = getattr(bench_runner_module, args.benchrunner_class)
     ods_args = {}
     if args.ods_client and args.ods_entity:
@@ -29,25 +29,29 @@ class DataSource(ABC):
 
 
 class Log:
+    # The assumption is that a new log will start with a date printed in
+    # the below regex format.
+    DATE_REGEX = re.compile(r"\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d{6}")
+
     @staticmethod
     def is_new_log(log_line):
-        # The assumption is that a new log will start with a date printed in
-        # the below regex format.
-        date_regex = "\d{4}/\d{2}/\d{2}-\d{2}:\d{2}:\d{2}\.\d{6}"  # noqa
-        return re.match(date_regex, log_line)
+        return Log.DATE_REGEX.match(log_line)
 
     def __init__(self, log_line, column_families):
         token_list = log_line.strip().split()
         self.time = token_list[0]
         self.context = token_list[1]
-        self.message = " ".join(token_list[2:])
+        # the message is kept as a list of lines that is joined lazily by
+        # get_message(), so that appending the remaining lines of a long log
+        # does not copy the whole message each time
+        self._message_parts = [" ".join(token_list[2:])]
         self.column_family = None
         # example log for 'default' column family:
         # "2018/07/25-17:29:05.176080 7f969de68700 [db/compaction_job.cc:1634]
         # [default] [JOB 3] Compacting 24@0 + 16@1 files to L1, score 6.00\n"
         for col_fam in column_families:
             search_for_str = "\[" + col_fam + "\]"  # noqa
-            if re.search(search_for_str, self.message):
+            if re.search(search_for_str, self._message_parts[0]):
                 self.column_family = col_fam
                 break
         if not self.column_family:
@@ -64,10 +68,12 @@ class Log:
         return self.context
 
     def get_message(self):
-        return self.message
+        if len(self._message_parts) > 1:
+            self._message_parts = ["\n".join(self._message_parts)]
+        return self._message_parts[0]
 
     def append_message(self, remaining_log):
-        self.message = self.message + "\n" + remaining_log.strip()
+        self._message_parts.append(remaining_log.strip())
 
     def get_timestamp(self):
         # example: '2018/07/25-11:25:45.782710' will be converted to the GMT
@@ -86,7 +92,7 @@ class Log:
             + "; col_fam: "
             + self.column_family
             + "; message: "
-            + self.message
+            + self.get_message()
         )
 
 
@@ -4,10 +4,14 @@
 #  (found in the LICENSE.Apache file in the root directory).
 
 import copy
-import glob
+import mmap
+import os
 import re
+import shlex
 import subprocess
 import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from typing import List
 
 from advisor.db_log_parser import Log
@@ -16,9 +20,12 @@ from advisor.db_timeseries_parser import NO_ENTITY, TimeSeriesData
 
 class LogStatsParser(TimeSeriesData):
     STATS = "STATISTICS:"
+    # matches the date that every new log in a LOG file starts with, see
+    # Log.is_new_log()
+    LOG_START_REGEX = re.compile(b"^" + Log.DATE_REGEX.pattern.encode(), re.MULTILINE)
 
     @staticmethod
-    def parse_log_line_for_stats(log_line):
+    def parse_log_line_for_stats(log_line, reqd_stats=None):
         # Example stat line (from LOG file):
         # "rocksdb.db.get.micros P50 : 8.4 P95 : 21.8 P99 : 33.9 P100 : 92.0\n"
         token_list = log_line.strip().split()
@@ -28,13 +35,13 @@ class LogStatsParser(TimeSeriesData):
         stat_values = [token for token in token_list[1:] if token != ":"]
         # stat_values = ['P50', '8.4', 'P95', '21.8', 'P99', '33.9', 'P100',
         # '92.0']
+        # pair up the metric names with their values; if reqd_stats is given,
+        # only those stats are converted to float and returned
         stat_dict = {}
-        for ix, metric in enumerate(stat_values):
-            if ix % 2 == 0:
-                stat_name = stat_prefix + metric
-                stat_name = stat_name.lower()  # Note: case insensitive names
-            else:
-                stat_dict[stat_name] = float(metric)
+        for metric, value in zip(stat_values[0::2], stat_values[1::2]):
+            stat_name = (stat_prefix + metric).lower()  # case insensitive names
+            if reqd_stats is None or stat_name in reqd_stats:
+                stat_dict[stat_name] = float(value)
         # stat_dict = {'rocksdb.db.get.micros.p50': 8.4,
         # 'rocksdb.db.get.micros.p95': 21.8, 'rocksdb.db.get.micros.p99': 33.9,
         # 'rocksdb.db.get.micros.p100': 92.0}
@@ -48,19 +55,11 @@ class LogStatsParser(TimeSeriesData):
 
     def get_keys_from_conditions(self, conditions):
         # Note: case insensitive stat names
-        reqd_stats = []
-        for cond in conditions:
-            for key in cond.keys:
-                key = key.lower()
-                # some keys are prepended with '[]' for OdsStatsFetcher to
-                # replace this with the appropriate key_prefix, remove these
-                # characters here since the LogStatsParser does not need
-                # a prefix
-                if key.startswith("[]"):
-                    reqd_stats.append(key[2:])
-                else:
-                    reqd_stats.append(key)
-        return reqd_stats
+        # some keys are prepended with '[]' for OdsStatsFetcher to replace
+        # this with the appropriate key_prefix, remove these characters here
+        # since the LogStatsParser does not need a prefix
+        lower_keys = (key.lower() for cond in conditions for key in cond.keys)
+        return [key[2:] if key.startswith("[]") else key for key in lower_keys]
 
     def add_to_timeseries(self, log, reqd_stats):
         # this method takes in the Log object that contains the Rocksdb stats
@@ -82,36 +81,93 @@ class LogStatsParser(TimeSeriesData):
         # keys_ts[NO_ENTITY]['rocksdb.db.get.micros.p99'][1532518219] = 62.6
         # keys_ts[NO_ENTITY]['rocksdb.block.cache.hit.count'][1532518219] = 37
         for line in new_lines[1:]:  # new_lines[0] does not contain any stats
-            stats_on_line = self.parse_log_line_for_stats(line)
+            stats_on_line = self.parse_log_line_for_stats(line, reqd_stats)
             for stat in stats_on_line:
-                if stat in reqd_stats:
-                    if stat not in self.keys_ts[NO_ENTITY]:
-                        self.keys_ts[NO_ENTITY][stat] = {}
-                    self.keys_ts[NO_ENTITY][stat][log_ts] = stats_on_line[stat]
+                if stat not in self.keys_ts[NO_ENTITY]:
+                    self.keys_ts[NO_ENTITY][stat] = {}
+                self.keys_ts[NO_ENTITY][stat][log_ts] = stats_on_line[stat]
+
+    def _read_stats_logs(self, file_name):
+        # this method yields the Log objects in the LOG file 'file_name' that
+        # contain Rocksdb stats; the file is memory-mapped and scanned for the
+        # start of each log in one pass, and only the logs that contain
+        # STATISTICS are decoded and turned into Log objects
+        with open(file_name, "rb") as db_logs:
+            if os.fstat(db_logs.fileno()).st_size == 0:
+                # an empty file cannot be memory-mapped
+                return
+            with mmap.mmap(db_logs.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                starts = [m.start() for m in self.LOG_START_REGEX.finditer(buf)]
+                ends = starts[1:] + [len(buf)]
+                stats = self.STATS.encode()
+                for start, end in zip(starts, ends):
+                    if buf.find(stats, start, end) == -1:
+                        continue
+                    # To account for logs split into multiple lines
+                    lines = buf[start:end].decode().splitlines()
+                    log = Log(lines[0], column_families=[])
+                    for line in lines[1:]:
+                        log.append_message(line)
+                    yield log
+
+    def _get_log_file_names(self):
+        # this method returns the paths of the LOG files that start with
+        # logs_file_prefix; a single scandir() of the LOG directory is used,
+        # so that no extra stat() call is needed per rotated LOG file
+        log_dir, log_file_prefix = os.path.split(self.logs_file_prefix)
+        log_dir = log_dir or os.curdir
+        if not os.path.isdir(log_dir):
+            return []
+        # TODO(poojam23): find a way to distinguish between 'old' log files
+        # from current and previous experiments, present in the same
+        # directory
+        with os.scandir(log_dir) as entries:
+            return [
+                entry.path
+                for entry in entries
+                if entry.name.startswith(log_file_prefix)
+                and "old" not in entry.name.lower()
+                and entry.is_file()
+            ]
 
     def fetch_timeseries(self, reqd_stats):
         # this method parses the Rocksdb LOG file and generates timeseries for
         # each of the statistic in the list reqd_stats
         self.keys_ts = {NO_ENTITY: {}}
-        for file_name in glob.glob(self.logs_file_prefix + "*"):
-            # TODO(poojam23): find a way to distinguish between 'old' log files
-            # from current and previous experiments, present in the same
-            # directory
-            if re.search("old", file_name, re.IGNORECASE):
-                continue
-            with open(file_name, "r") as db_logs:
-                new_log = None
-                for line in db_logs:
-                    if Log.is_new_log(line):
-                        if new_log and re.search(self.STATS, new_log.get_message()):
-                            self.add_to_timeseries(new_log, reqd_stats)
-                        new_log = Log(line, column_families=[])
-                    else:
-                        # To account for logs split into multiple lines
-                        new_log.append_message(line)
-            # Check for the last log in the file.
-            if new_log and re.search(self.STATS, new_log.get_message()):
-                self.add_to_timeseries(new_log, reqd_stats)
+        # every stat on every STATISTICS line is looked up in reqd_stats
+        reqd_stats = frozenset(reqd_stats)
+        file_names = self._get_log_file_names()
+        if len(file_names) > 1:
+            # the LOG files are independent of each other, so parse them in
+            # parallel worker processes
+            with ProcessPoolExecutor(
+                max_workers=min(len(file_names), os.cpu_count() or 1)
+            ) as executor:
+                file_stats = list(
+                    executor.map(_parse_stats_log_file, file_names, repeat(reqd_stats))
+                )
+        else:
+            file_stats = [
+                _parse_stats_log_file(file_name, reqd_stats) for file_name in file_names
+            ]
+        # merge the per-file timeseries in the order of file_names
+        for stats in file_stats:
+            for stat in stats:
+                if stat not in self.keys_ts[NO_ENTITY]:
+                    self.keys_ts[NO_ENTITY][stat] = {}
+                self.keys_ts[NO_ENTITY][stat].update(stats[stat])
+
+
+def _parse_stats_log_file(file_name, reqd_stats):
+    # this function parses a single Rocksdb LOG file and returns the
+    # timeseries of the stats in reqd_stats found in it:
+    # Dict[stat, Dict[timestamp, value]]; it is a module-level function so
+    # that LogStatsParser.fetch_timeseries() can run it in worker processes
+    log_stats_parser = LogStatsParser(file_name, None)
+    log_stats_parser.keys_ts = {NO_ENTITY: {}}
+    for log in log_stats_parser._read_stats_logs(file_name):
+        log_stats_parser.add_to_timeseries(log, reqd_stats)
+    return log_stats_parser.keys_ts[NO_ENTITY]
 
 
 class DatabasePerfContext(TimeSeriesData):
@@ -166,25 +222,11 @@ class DatabasePerfContext(TimeSeriesData):
 
 class OdsStatsFetcher(TimeSeriesData):
     # class constants
-    OUTPUT_FILE = "temp/stats_out.tmp"
     ERROR_FILE = "temp/stats_err.tmp"
-    RAPIDO_COMMAND = "%s --entity=%s --key=%s --tstart=%s --tend=%s --showtime"
+    # matches each '[<timestamp>, <value>]' pair in the Rapido output
+    TIME_VALUE_PAIR_REGEX = re.compile(r"\[\s*(\d+)\s*,\s*([^\[\],\s]+)\s*\]")
 
     # static methods
-    @staticmethod
-    def _get_string_in_quotes(value):
-        return '"' + str(value) + '"'
-
-    @staticmethod
-    def _get_time_value_pair(pair_string):
-        # example pair_string: '[1532544591, 97.3653601828]'
-        pair_string = pair_string.replace("[", "")
-        pair_string = pair_string.replace("]", "")
-        pair = pair_string.split(",")
-        first = int(pair[0].strip())
-        second = float(pair[1].strip())
-        return [first, second]
-
     @staticmethod
     def _get_ods_cli_stime(start_time):
         diff = int(time.time() - int(start_time))
@@ -198,104 +240,97 @@ class OdsStatsFetcher(TimeSeriesData):
         self.start_time = start_time
         self.end_time = end_time
         self.key_prefix = key_prefix
+        # prepended to the keys that start with '[]', see
+        # get_keys_from_conditions()
+        self._prefix = (key_prefix + ".") if key_prefix else ""
         self.stats_freq_sec = 60
         self.duration_sec = 60
 
     def execute_script(self, command):
+        # this method runs the client tool and yields the lines that it writes
+        # to stdout as they are produced, so that the output can be parsed
+        # while streaming instead of going through a temporary file
         print("executing...")
         print(command)
-        out_file = open(self.OUTPUT_FILE, "w+")
-        err_file = open(self.ERROR_FILE, "w+")
-        subprocess.call(command, shell=True, stdout=out_file, stderr=err_file)
-        out_file.close()
-        err_file.close()
+        with open(self.ERROR_FILE, "w+") as err_file, subprocess.Popen(
+            shlex.split(command),
+            stdout=subprocess.PIPE,
+            stderr=err_file,
+            universal_newlines=True,
+        ) as proc:
+            yield from proc.stdout
 
-    def parse_rapido_output(self):
+    def parse_rapido_output(self, output):
         # Output looks like the following:
         # <entity_name>\t<key_name>\t[[ts, value], [ts, value], ...]
         # ts = timestamp; value = value of key_name in entity_name at time ts
         self.keys_ts = {}
-        with open(self.OUTPUT_FILE, "r") as fp:
-            for line in fp:
-                token_list = line.strip().split("\t")
-                entity = token_list[0]
-                key = token_list[1]
-                if entity not in self.keys_ts:
-                    self.keys_ts[entity] = {}
-                if key not in self.keys_ts[entity]:
-                    self.keys_ts[entity][key] = {}
-                list_of_lists = [
-                    self._get_time_value_pair(pair_string)
-                    for pair_string in token_list[2].split("],")
-                ]
-                value = {pair[0]: pair[1] for pair in list_of_lists}
-                self.keys_ts[entity][key] = value
+        for line in output:
+            token_list = line.strip().split("\t")
+            entity = token_list[0]
+            key = token_list[1]
+            if entity not in self.keys_ts:
+                self.keys_ts[entity] = {}
+            if key not in self.keys_ts[entity]:
+                self.keys_ts[entity][key] = {}
+            # example token_list[2]: '[[1532544591, 97.3653601828], ...]'
+            value = {
+                int(pair.group(1)): float(pair.group(2))
+                for pair in self.TIME_VALUE_PAIR_REGEX.finditer(token_list[2])
+            }
+            self.keys_ts[entity][key] = value
 
-    def parse_ods_output(self):
+    def parse_ods_output(self, output):
         # Output looks like the following:
         # <entity_name>\t<key_name>\t<timestamp>\t<value>
         # there is one line per (entity_name, key_name, timestamp)
         self.keys_ts = {}
-        with open(self.OUTPUT_FILE, "r") as fp:
-            for line in fp:
-                token_list = line.split()
-                entity = token_list[0]
-                if entity not in self.keys_ts:
-                    self.keys_ts[entity] = {}
-                key = token_list[1]
-                if key not in self.keys_ts[entity]:
-                    self.keys_ts[entity][key] = {}
-                self.keys_ts[entity][key][token_list[2]] = token_list[3]
+        for line in output:
+            token_list = line.split()
+            entity = token_list[0]
+            if entity not in self.keys_ts:
+                self.keys_ts[entity] = {}
+            key = token_list[1]
+            if key not in self.keys_ts[entity]:
+                self.keys_ts[entity][key] = {}
+            self.keys_ts[entity][key][token_list[2]] = token_list[3]
 
     def fetch_timeseries(self, statistics):
         # this method fetches the timeseries of required stats from the ODS
         # service and populates the 'keys_ts' object appropriately
         print("OdsStatsFetcher: fetching " + str(statistics))
         if re.search("rapido", self.client, re.IGNORECASE):
-            command = self.RAPIDO_COMMAND % (
-                self.client,
-                self._get_string_in_quotes(self.entities),
-                self._get_string_in_quotes(",".join(statistics)),
-                self._get_string_in_quotes(self.start_time),
-                self._get_string_in_quotes(self.end_time),
+            command = (
+                f'{self.client} --entity="{self.entities}" '
+                f'--key="{",".join(statistics)}" --tstart="{self.start_time}" '
+                f'--tend="{self.end_time}" --showtime'
             )
-            # Run the tool and fetch the time-series data
-            self.execute_script(command)
-            # Parse output and populate the 'keys_ts' map
-            self.parse_rapido_output()
+            # Run the tool, parse its output and populate the 'keys_ts' map
+            self.parse_rapido_output(self.execute_script(command))
         elif re.search("ods", self.client, re.IGNORECASE):
             command = (
-                self.client
-                + " "
-                + "--stime="
-                + self._get_ods_cli_stime(self.start_time)
-                + " "
-                + self._get_string_in_quotes(self.entities)
-                + " "
-                + self._get_string_in_quotes(",".join(statistics))
+                f"{self.client} --stime={self._get_ods_cli_stime(self.start_time)} "
+                f'"{self.entities}" "{",".join(statistics)}"'
             )
-            # Run the tool and fetch the time-series data
-            self.execute_script(command)
-            # Parse output and populate the 'keys_ts' map
-            self.parse_ods_output()
+            # Run the tool, parse its output and populate the 'keys_ts' map
+            self.parse_ods_output(self.execute_script(command))
 
     def get_keys_from_conditions(self, conditions):
         reqd_stats = []
+        prefix = self._prefix
         for cond in conditions:
             for key in cond.keys:
-                use_prefix = False
-                if key.startswith("[]"):
-                    use_prefix = True
+                use_prefix = key.startswith("[]")
+                if use_prefix:
                     key = key[2:]
                 # TODO(poojam23): this is very hacky and needs to be improved
                 if key.startswith("rocksdb"):
                     key += ".60"
                 if use_prefix:
-                    if not self.key_prefix:
+                    if not prefix:
                         print("Warning: OdsStatsFetcher might need key prefix")
                         print("for the key: " + key)
-                    else:
-                        key = self.key_prefix + "." + key
+                    key = prefix + key
                 reqd_stats.append(key)
         return reqd_stats
 
@@ -307,40 +342,26 @@ class OdsStatsFetcher(TimeSeriesData):
         percent: str,
         display: bool,
     ) -> str:
-        transform_desc = (
-            "rate(" + str(window_len) + ",duration=" + str(self.duration_sec)
-        )
+        transform_desc = f"rate({window_len},duration={self.duration_sec}"
         if percent:
-            transform_desc = transform_desc + ",%)"
+            transform_desc += ",%)"
         else:
-            transform_desc = transform_desc + ")"
+            transform_desc += ")"
         if re.search("rapido", self.client, re.IGNORECASE):
-            command = self.RAPIDO_COMMAND + " --transform=%s --url=%s"
-            command = command % (
-                self.client,
-                self._get_string_in_quotes(",".join(entities)),
-                self._get_string_in_quotes(",".join(keys)),
-                self._get_string_in_quotes(self.start_time),
-                self._get_string_in_quotes(self.end_time),
-                self._get_string_in_quotes(transform_desc),
-                self._get_string_in_quotes(display),
+            command = (
+                f'{self.client} --entity="{",".join(entities)}" '
+                f'--key="{",".join(keys)}" --tstart="{self.start_time}" '
+                f'--tend="{self.end_time}" --showtime '
+                f'--transform="{transform_desc}" --url="{display}"'
             )
         elif re.search("ods", self.client, re.IGNORECASE):
             command = (
-                self.client
-                + " "
-                + "--stime="
-                + self._get_ods_cli_stime(self.start_time)
-                + " "
-                + "--fburlonly "
-                + self._get_string_in_quotes(entities)
-                + " "
-                + self._get_string_in_quotes(",".join(keys))
-                + " "
-                + self._get_string_in_quotes(transform_desc)
+                f"{self.client} --stime={self._get_ods_cli_stime(self.start_time)} "
+                f'--fburlonly "{entities}" "{",".join(keys)}" "{transform_desc}"'
             )
-        self.execute_script(command)
         url = ""
-        with open(self.OUTPUT_FILE, "r") as fp:
-            url = fp.readline()
+        for line in self.execute_script(command):
+            # the url is on the first line of the output
+            if not url:
+                url = line
         return url
@@ -77,12 +77,13 @@ class TimeSeriesData(DataSource):
         for entity in entities:
             if statistic not in self.keys_ts[entity]:
                 continue
-            timestamps = sorted(list(self.keys_ts[entity][statistic].keys()))
+            timeseries = self.keys_ts[entity][statistic]
+            timestamps = sorted(timeseries)
             for ix in range(window_samples, len(timestamps), 1):
                 first_ts = timestamps[ix - window_samples]
                 last_ts = timestamps[ix]
-                first_val = self.keys_ts[entity][statistic][first_ts]
-                last_val = self.keys_ts[entity][statistic][last_ts]
+                first_val = timeseries[first_ts]
+                last_val = timeseries[last_ts]
                 diff = last_val - first_val
                 if percent:
                     diff = diff * 100 / first_val
@@ -99,30 +100,31 @@ class TimeSeriesData(DataSource):
         # this method performs the aggregation specified by 'aggregation_op'
         # on the timeseries of 'statistics' for 'entity' and returns:
         # Dict[statistic, aggregated_value]
+        # note: the builtins below consume the timeseries dict views directly
+        # instead of copying the timestamps or values into a list first
         result = {}
         for stat in statistics:
             if stat not in self.keys_ts[entity]:
                 continue
+            timeseries = self.keys_ts[entity][stat]
             agg_val = None
             if aggregation_op is self.AggregationOperator.latest:
-                latest_timestamp = max(list(self.keys_ts[entity][stat].keys()))
-                agg_val = self.keys_ts[entity][stat][latest_timestamp]
+                agg_val = timeseries[max(timeseries)]
             elif aggregation_op is self.AggregationOperator.oldest:
-                oldest_timestamp = min(list(self.keys_ts[entity][stat].keys()))
-                agg_val = self.keys_ts[entity][stat][oldest_timestamp]
+                agg_val = timeseries[min(timeseries)]
             elif aggregation_op is self.AggregationOperator.max:
-                agg_val = max(list(self.keys_ts[entity][stat].values()))
+                agg_val = max(timeseries.values())
             elif aggregation_op is self.AggregationOperator.min:
-                agg_val = min(list(self.keys_ts[entity][stat].values()))
+                agg_val = min(timeseries.values())
             elif aggregation_op is self.AggregationOperator.avg:
-                values = list(self.keys_ts[entity][stat].values())
-                agg_val = sum(values) / len(values)
+                agg_val = sum(timeseries.values()) / len(timeseries)
             result[stat] = agg_val
         return result
 
     def check_and_trigger_conditions(self, conditions):
-        # get the list of statistics that need to be fetched
-        reqd_keys = self.get_keys_from_conditions(conditions)
+        # get the list of statistics that need to be fetched; conditions often
+        # share keys, so each key is fetched only once
+        reqd_keys = list(dict.fromkeys(self.get_keys_from_conditions(conditions)))
         # fetch the required statistics and populate the map 'keys_ts'
         self.fetch_timeseries(reqd_keys)
         # Trigger the appropriate conditions
@@ -31,6 +31,49 @@ class TestLogStatsParser(unittest.TestCase):
         self.log_stats_parser = LogStatsParser("dummy_log_file", 20)
         self.log_stats_parser.keys_ts = self.stats_dict
 
+    def test_parse_log_line_for_stats(self):
+        log_line = "rocksdb.db.get.micros P50 : 8.4 P95 : 21.8 P99 : 33.9 P100 : 92.0\n"
+        expected_stats = {
+            "rocksdb.db.get.micros.p50": 8.4,
+            "rocksdb.db.get.micros.p95": 21.8,
+            "rocksdb.db.get.micros.p99": 33.9,
+            "rocksdb.db.get.micros.p100": 92.0,
+        }
+        self.assertDictEqual(
+            expected_stats, LogStatsParser.parse_log_line_for_stats(log_line)
+        )
+        # only the required stats are returned
+        reqd_stats = frozenset(
+            ["rocksdb.db.get.micros.p99", "rocksdb.block.cache.hit.count"]
+        )
+        self.assertDictEqual(
+            {"rocksdb.db.get.micros.p99": 33.9},
+            LogStatsParser.parse_log_line_for_stats(log_line, reqd_stats),
+        )
+
+    def test_fetch_timeseries(self):
+        this_path = os.path.abspath(os.path.dirname(__file__))
+        logs_path_prefix = os.path.join(this_path, "input_files/LOG_stats")
+        log_stats_parser = LogStatsParser(logs_path_prefix, 20)
+        log_stats_parser.fetch_timeseries(
+            ["rocksdb.block.cache.hit.count", "rocksdb.db.get.micros.p99"]
+        )
+        expected_keys_ts = {
+            NO_ENTITY: {
+                "rocksdb.block.cache.hit.count": {
+                    1532539745: 37.0,
+                    1532539765: 52.0,
+                    1532539785: 64.0,
+                },
+                "rocksdb.db.get.micros.p99": {
+                    1532539745: 33.9,
+                    1532539765: 35.2,
+                    1532539785: 31.7,
+                },
+            }
+        }
+        self.assertDictEqual(expected_keys_ts, log_stats_parser.keys_ts)
+
     def test_check_and_trigger_conditions_bursty(self):
         # mock fetch_timeseries() because 'keys_ts' has been pre-populated
         self.log_stats_parser.fetch_timeseries = MagicMock()
@@ -94,6 +137,30 @@ class TestLogStatsParser(unittest.TestCase):
         self.assertDictEqual(expected_trigger, cond1.get_trigger())
         self.log_stats_parser.fetch_timeseries.assert_called_once()
 
+    def test_check_and_trigger_conditions_single_fetch(self):
+        # mock fetch_timeseries() because 'keys_ts' has been pre-populated
+        self.log_stats_parser.fetch_timeseries = MagicMock()
+        # two conditions that share the key 'rocksdb.db.get.micros.p50'
+        cond1 = Condition("cond-1")
+        cond1 = TimeSeriesCondition.create(cond1)
+        cond1.set_parameter("keys", "rocksdb.db.get.micros.p50")
+        cond1.set_parameter("behavior", "bursty")
+        cond1.set_parameter("window_sec", 40)
+        cond1.set_parameter("rate_threshold", 0)
+        cond2 = Condition("cond-2")
+        cond2 = TimeSeriesCondition.create(cond2)
+        cond2.set_parameter("behavior", "evaluate_expression")
+        keys = ["rocksdb.manifest.file.sync.micros.p99", "rocksdb.db.get.micros.p50"]
+        cond2.set_parameter("keys", keys)
+        cond2.set_parameter("evaluate", "keys[0]-(keys[1]*100)>500")
+        self.log_stats_parser.check_and_trigger_conditions([cond1, cond2])
+        self.assertIsNotNone(cond1.get_trigger())
+        self.assertIsNotNone(cond2.get_trigger())
+        # the keys of all the conditions are fetched together, once each
+        self.log_stats_parser.fetch_timeseries.assert_called_once_with(
+            ["rocksdb.db.get.micros.p50", "rocksdb.manifest.file.sync.micros.p99"]
+        )
+
 
 class TestDatabasePerfContext(unittest.TestCase):
     def test_unaccumulate_metrics(self):
@@ -2,11 +2,12 @@
 # Copyright (c) Facebook, Inc. and its affiliates. All Rights Reserved.
 
 import gc
-import heapq
 import random
 import sys
 import time
-from collections import OrderedDict
+from array import array
+from collections import defaultdict, OrderedDict
+from functools import cmp_to_key
 from os import path
 
 import numpy as np
@@ -25,6 +26,31 @@ class TraceRecord:
     trace_replay/block_cache_tracer.h
     """
 
+    __slots__ = (
+        "access_time",
+        "block_id",
+        "block_type",
+        "block_size",
+        "cf_id",
+        "cf_name",
+        "level",
+        "fd",
+        "caller",
+        "no_insert",
+        "get_id",
+        "key_id",
+        "kv_size",
+        "is_hit",
+        "referenced_key_exist_in_block",
+        "num_keys_in_block",
+        "table_id",
+        "seq_number",
+        "block_key_size",
+        "key_size",
+        "block_offset_in_file",
+        "next_access_seq_no",
+    )
+
     def __init__(
         self,
         access_time,
@@ -86,6 +112,18 @@ class TraceRecord:
 class CacheEntry:
     """A cache entry stored in the cache."""
 
+    __slots__ = (
+        "value_size",
+        "last_access_number",
+        "num_hits",
+        "cf_id",
+        "level",
+        "block_type",
+        "last_access_time",
+        "insertion_time",
+        "table_id",
+    )
+
     def __init__(
         self,
         value_size,
@@ -135,9 +173,25 @@ class CacheEntry:
         return None
 
 
+class GetRequestState:
+    """
+    The state of a get request in the hybrid row/block cache: whether it has
+    observed a row hit and, for each row key it has accessed, whether the row
+    has been inserted into the cache.
+    """
+
+    __slots__ = ("hit", "inserted")
+
+    def __init__(self):
+        self.hit = False
+        self.inserted = {}
+
+
 class HashEntry:
     """A hash entry stored in a hash table."""
 
+    __slots__ = ("key", "hash", "value")
+
     def __init__(self, key, hash, value):
         self.key = key
         self.hash = hash
@@ -149,162 +203,74 @@ class HashEntry:
 
 class HashTable:
     """
-    A custom implementation of hash table to support fast random sampling.
-    It is closed hashing and uses chaining to resolve hash conflicts.
-    It grows/shrinks the hash table upon insertion/deletion to support
-    fast lookups and random samplings.
+    A hash table that supports fast random sampling.
+    Entries are stored in a dense list and a dict maps each (hash, key) pair to
+    the entry's position in that list. A deletion moves the last entry into the
+    freed slot so that the list never has holes, which makes a random sample a
+    plain random.sample() over the list.
     """
 
     def __init__(self):
-        self.initial_size = 32
-        self.table = [None] * self.initial_size
-        self.elements = 0
+        self._entries = []
+        self._map = {}
+
+    @property
+    def elements(self):
+        return len(self._entries)
 
     def random_sample(self, sample_size):
         """Randomly sample 'sample_size' hash entries from the table."""
-        samples = []
-        index = random.randint(0, len(self.table) - 1)
-        pos = index
-        # Starting from index, adding hash entries to the sample list until
-        # sample_size is met or we ran out of entries.
-        while True:
-            if self.table[pos] is not None:
-                for i in range(len(self.table[pos])):
-                    if self.table[pos][i] is None:
-                        continue
-                    samples.append(self.table[pos][i])
-                    if len(samples) == sample_size:
-                        break
-            pos += 1
-            pos = pos % len(self.table)
-            if pos == index or len(samples) == sample_size:
-                break
-        assert len(samples) <= sample_size
-        return samples
+        return random.sample(self._entries, min(sample_size, len(self._entries)))
 
     def __repr__(self):
-        all_entries = []
-        for i in range(len(self.table)):
-            if self.table[i] is None:
-                continue
-            for j in range(len(self.table[i])):
-                if self.table[i][j] is not None:
-                    all_entries.append(self.table[i][j])
-        return "{}".format(all_entries)
+        return "{}".format(self._entries)
 
     def values(self):
-        all_values = []
-        for i in range(len(self.table)):
-            if self.table[i] is None:
-                continue
-            for j in range(len(self.table[i])):
-                if self.table[i][j] is not None:
-                    all_values.append(self.table[i][j].value)
-        return all_values
+        return [entry.value for entry in self._entries]
 
     def __len__(self):
-        return self.elements
+        return len(self._entries)
 
     def insert(self, key, hash, value):
         """
         Insert a hash entry in the table. Replace the old entry if it already
         exists.
         """
-        self.grow()
-        inserted = False
-        index = hash % len(self.table)
-        if self.table[index] is None:
-            self.table[index] = []
-        # Search for the entry first.
-        for i in range(len(self.table[index])):
-            if self.table[index][i] is None:
-                continue
-            if self.table[index][i].hash == hash and self.table[index][i].key == key:
-                # The entry already exists in the table.
-                self.table[index][i] = HashEntry(key, hash, value)
-                return
-
-        # Find an empty slot.
-        for i in range(len(self.table[index])):
-            if self.table[index][i] is None:
-                self.table[index][i] = HashEntry(key, hash, value)
-                inserted = True
-                break
-        if not inserted:
-            self.table[index].append(HashEntry(key, hash, value))
-        self.elements += 1
-
-    def resize(self, new_size):
-        if new_size == len(self.table):
-            return
-        if new_size < self.initial_size:
-            return
-        if self.elements < 100:
-            return
-        new_table = [None] * new_size
-        # Copy 'self.table' to new_table.
-        for i in range(len(self.table)):
-            entries = self.table[i]
-            if entries is None:
-                continue
-            for j in range(len(entries)):
-                if entries[j] is None:
-                    continue
-                index = entries[j].hash % new_size
-                if new_table[index] is None:
-                    new_table[index] = []
-                new_table[index].append(entries[j])
-        self.table = new_table
-        del new_table
-        # Manually call python gc here to free the memory as 'self.table'
-        # might be very large.
-        gc.collect()
-
-    def grow(self):
-        if self.elements < 4 * len(self.table):
+        index = self._map.get((hash, key))
+        if index is not None:
+            # The entry already exists in the table.
+            self._entries[index].value = value
             return
-        new_size = int(len(self.table) * 1.5)
-        self.resize(new_size)
+        self._map[(hash, key)] = len(self._entries)
+        self._entries.append(HashEntry(key, hash, value))
 
     def delete(self, key, hash):
-        index = hash % len(self.table)
-        deleted = False
-        deleted_entry = None
-        if self.table[index] is None:
-            return
-        for i in range(len(self.table[index])):
-            if (
-                self.table[index][i] is not None
-                and self.table[index][i].hash == hash
-                and self.table[index][i].key == key
-            ):
-                deleted_entry = self.table[index][i]
-                self.table[index][i] = None
-                self.elements -= 1
-                deleted = True
-                break
-        if deleted:
-            self.shrink()
+        index = self._map.pop((hash, key), None)
+        if index is None:
+            return None
+        deleted_entry = self._entries[index]
+        last_entry = self._entries.pop()
+        if last_entry is not deleted_entry:
+            # Fill the hole with the last entry.
+            self._entries[index] = last_entry
+            self._map[(last_entry.hash, last_entry.key)] = index
         return deleted_entry
 
-    def shrink(self):
-        if self.elements * 2 >= len(self.table):
-            return
-        new_size = int(len(self.table) * 0.7)
-        self.resize(new_size)
-
     def lookup(self, key, hash):
-        index = hash % len(self.table)
-        if self.table[index] is None:
+        index = self._map.get((hash, key))
+        if index is None:
             return None
-        for i in range(len(self.table[index])):
-            if (
-                self.table[index][i] is not None
-                and self.table[index][i].hash == hash
-                and self.table[index][i].key == key
-            ):
-                return self.table[index][i].value
-        return None
+        return self._entries[index].value
+
+
+def write_timeline_header(header_file_path, start, end):
+    """Write the 'time' header row of a timeline file unless it exists."""
+    if path.exists(header_file_path):
+        return
+    with open(header_file_path, "w+") as header_file:
+        header = ["time"]
+        header.extend(str(trace_time) for trace_time in range(start, end))
+        header_file.write(",".join(header) + "\n")
 
 
 class MissRatioStats:
@@ -312,21 +278,18 @@ class MissRatioStats:
         self.num_misses = 0
         self.num_accesses = 0
         self.time_unit = time_unit
-        self.time_misses = {}
-        self.time_miss_bytes = {}
-        self.time_accesses = {}
+        # The number of microseconds in one time unit.
+        self.micros_in_time_unit = kMicrosInSecond * time_unit
+        self.time_misses = defaultdict(int)
+        self.time_miss_bytes = defaultdict(int)
+        self.time_accesses = defaultdict(int)
 
     def update_metrics(self, access_time, is_hit, miss_bytes):
-        access_time /= kMicrosInSecond * self.time_unit
+        access_time //= self.micros_in_time_unit
         self.num_accesses += 1
-        if access_time not in self.time_accesses:
-            self.time_accesses[access_time] = 0
         self.time_accesses[access_time] += 1
         if not is_hit:
             self.num_misses += 1
-            if access_time not in self.time_misses:
-                self.time_misses[access_time] = 0
-                self.time_miss_bytes[access_time] = 0
             self.time_misses[access_time] += 1
             self.time_miss_bytes[access_time] += miss_bytes
 
@@ -357,45 +320,35 @@ class MissRatioStats:
     def write_miss_timeline(
         self, cache_type, cache_size, target_cf_name, result_dir, start, end
     ):
-        start /= kMicrosInSecond * self.time_unit
-        end /= kMicrosInSecond * self.time_unit
+        start //= self.micros_in_time_unit
+        end //= self.micros_in_time_unit
         header_file_path = "{}/header-ml-miss-timeline-{}-{}-{}-{}".format(
             result_dir, self.time_unit, cache_type, cache_size, target_cf_name
         )
-        if not path.exists(header_file_path):
-            with open(header_file_path, "w+") as header_file:
-                header = "time"
-                for trace_time in range(start, end):
-                    header += ",{}".format(trace_time)
-                header_file.write(header + "\n")
+        write_timeline_header(header_file_path, start, end)
         file_path = "{}/data-ml-miss-timeline-{}-{}-{}-{}".format(
             result_dir, self.time_unit, cache_type, cache_size, target_cf_name
         )
         with open(file_path, "w+") as file:
-            row = "{}".format(cache_type)
+            row = [cache_type]
             for trace_time in range(start, end):
-                row += ",{}".format(self.time_misses.get(trace_time, 0))
-            file.write(row + "\n")
+                row.append(str(self.time_misses.get(trace_time, 0)))
+            file.write(",".join(row) + "\n")
 
     def write_miss_ratio_timeline(
         self, cache_type, cache_size, target_cf_name, result_dir, start, end
     ):
-        start /= kMicrosInSecond * self.time_unit
-        end /= kMicrosInSecond * self.time_unit
+        start //= self.micros_in_time_unit
+        end //= self.micros_in_time_unit
         header_file_path = "{}/header-ml-miss-ratio-timeline-{}-{}-{}-{}".format(
             result_dir, self.time_unit, cache_type, cache_size, target_cf_name
         )
-        if not path.exists(header_file_path):
-            with open(header_file_path, "w+") as header_file:
-                header = "time"
-                for trace_time in range(start, end):
-                    header += ",{}".format(trace_time)
-                header_file.write(header + "\n")
+        write_timeline_header(header_file_path, start, end)
         file_path = "{}/data-ml-miss-ratio-timeline-{}-{}-{}-{}".format(
             result_dir, self.time_unit, cache_type, cache_size, target_cf_name
         )
         with open(file_path, "w+") as file:
-            row = "{}".format(cache_type)
+            row = [cache_type]
             for trace_time in range(start, end):
                 naccesses = self.time_accesses.get(trace_time, 0)
                 miss_ratio = 0
@@ -403,81 +356,69 @@ class MissRatioStats:
                     miss_ratio = float(
                         self.time_misses.get(trace_time, 0) * 100.0
                     ) / float(naccesses)
-                row += ",{0:.2f}".format(miss_ratio)
-            file.write(row + "\n")
+                row.append("{0:.2f}".format(miss_ratio))
+            file.write(",".join(row) + "\n")
 
 
 class PolicyStats:
     def __init__(self, time_unit, policies):
-        self.time_selected_polices = {}
-        self.time_accesses = {}
+        self.time_selected_polices = defaultdict(lambda: defaultdict(int))
+        self.time_accesses = defaultdict(int)
         self.policy_names = {}
         self.time_unit = time_unit
+        # The number of microseconds in one time unit.
+        self.micros_in_time_unit = kMicrosInSecond * time_unit
         for i in range(len(policies)):
             self.policy_names[i] = policies[i].policy_name()
 
     def update_metrics(self, access_time, selected_policy):
-        access_time /= kMicrosInSecond * self.time_unit
-        if access_time not in self.time_accesses:
-            self.time_accesses[access_time] = 0
+        access_time //= self.micros_in_time_unit
         self.time_accesses[access_time] += 1
-        if access_time not in self.time_selected_polices:
-            self.time_selected_polices[access_time] = {}
         policy_name = self.policy_names[selected_policy]
-        if policy_name not in self.time_selected_polices[access_time]:
-            self.time_selected_polices[access_time][policy_name] = 0
         self.time_selected_polices[access_time][policy_name] += 1
 
     def write_policy_timeline(
         self, cache_type, cache_size, target_cf_name, result_dir, start, end
     ):
-        start /= kMicrosInSecond * self.time_unit
-        end /= kMicrosInSecond * self.time_unit
+        start //= self.micros_in_time_unit
+        end //= self.micros_in_time_unit
         header_file_path = "{}/header-ml-policy-timeline-{}-{}-{}-{}".format(
             result_dir, self.time_unit, cache_type, cache_size, target_cf_name
         )
-        if not path.exists(header_file_path):
-            with open(header_file_path, "w+") as header_file:
-                header = "time"
-                for trace_time in range(start, end):
-                    header += ",{}".format(trace_time)
-                header_file.write(header + "\n")
+        write_timeline_header(header_file_path, start, end)
         file_path = "{}/data-ml-policy-timeline-{}-{}-{}-{}".format(
             result_dir, self.time_unit, cache_type, cache_size, target_cf_name
         )
         with open(file_path, "w+") as file:
             for policy in self.policy_names:
                 policy_name = self.policy_names[policy]
-                row = "{}-{}".format(cache_type, policy_name)
+                row = ["{}-{}".format(cache_type, policy_name)]
                 for trace_time in range(start, end):
-                    row += ",{}".format(
-                        self.time_selected_polices.get(trace_time, {}).get(
-                            policy_name, 0
+                    row.append(
+                        str(
+                            self.time_selected_polices.get(trace_time, {}).get(
+                                policy_name, 0
+                            )
                         )
                     )
-                file.write(row + "\n")
+                file.write(",".join(row) + "\n")
 
     def write_policy_ratio_timeline(
-        self, cache_type, cache_size, target_cf_name, file_path, start, end
+        self, cache_type, cache_size, target_cf_name, result_dir, start, end
     ):
-        start /= kMicrosInSecond * self.time_unit
-        end /= kMicrosInSecond * self.time_unit
+        start //= self.micros_in_time_unit
+        end //= self.micros_in_time_unit
         header_file_path = "{}/header-ml-policy-ratio-timeline-{}-{}-{}-{}".format(
             result_dir, self.time_unit, cache_type, cache_size, target_cf_name
         )
-        if not path.exists(header_file_path):
-            with open(header_file_path, "w+") as header_file:
-                header = "time"
-                for trace_time in range(start, end):
-                    header += ",{}".format(trace_time)
-                header_file.write(header + "\n")
+        write_timeline_header(header_file_path, start, end)
         file_path = "{}/data-ml-policy-ratio-timeline-{}-{}-{}-{}".format(
             result_dir, self.time_unit, cache_type, cache_size, target_cf_name
         )
         with open(file_path, "w+") as file:
             for policy in self.policy_names:
                 policy_name = self.policy_names[policy]
-                row = "{}-{}".format(cache_type, policy_name)
+                row = ["{}-{}".format(cache_type, policy_name)]
                 for trace_time in range(start, end):
                     naccesses = self.time_accesses.get(trace_time, 0)
                     ratio = 0
@@ -488,22 +429,28 @@ class PolicyStats:
                             )
                             * 100.0
                         ) / float(naccesses)
-                    row += ",{0:.2f}".format(ratio)
-                file.write(row + "\n")
+                    row.append("{0:.2f}".format(ratio))
+                file.write(",".join(row) + "\n")
 
 
 class Policy:
     """
     A policy maintains a set of evicted keys. It returns a reward of one to
     itself if it has not evicted a missing key. Otherwise, it gives itself 0
-    reward.
+    reward. The set remembers at most 'max_size' of the most recently evicted
+    keys.
     """
 
     def __init__(self):
-        self.evicted_keys = {}
+        # An insertion-ordered set: the oldest evicted key comes first.
+        self.evicted_keys = OrderedDict()
 
     def evict(self, key, max_size):
-        self.evicted_keys[key] = 0
+        evicted_keys = self.evicted_keys
+        evicted_keys[key] = None
+        evicted_keys.move_to_end(key)
+        while len(evicted_keys) > max_size:
+            evicted_keys.popitem(last=False)
 
     def delete(self, key):
         self.evicted_keys.pop(key, None)
@@ -522,11 +469,7 @@ class Policy:
 
 class LRUPolicy(Policy):
     def prioritize_samples(self, samples, auxilliary_info):
-        return sorted(
-            samples,
-            cmp=lambda e1, e2: e1.value.last_access_number
-            - e2.value.last_access_number,
-        )
+        return sorted(samples, key=lambda e: e.value.last_access_number)
 
     def policy_name(self):
         return "lru"
@@ -534,11 +477,7 @@ class LRUPolicy(Policy):
 
 class MRUPolicy(Policy):
     def prioritize_samples(self, samples, auxilliary_info):
-        return sorted(
-            samples,
-            cmp=lambda e1, e2: e2.value.last_access_number
-            - e1.value.last_access_number,
-        )
+        return sorted(samples, key=lambda e: -e.value.last_access_number)
 
     def policy_name(self):
         return "mru"
@@ -546,7 +485,7 @@ class MRUPolicy(Policy):
 
 class LFUPolicy(Policy):
     def prioritize_samples(self, samples, auxilliary_info):
-        return sorted(samples, cmp=lambda e1, e2: e1.value.num_hits - e2.value.num_hits)
+        return sorted(samples, key=lambda e: e.value.num_hits)
 
     def policy_name(self):
         return "lfu"
@@ -562,33 +501,27 @@ class HyperbolicPolicy(Policy):
     (USENIX ATC '17). USENIX Association, Berkeley, CA, USA, 499-511.
     """
 
-    def compare(self, e1, e2, now):
-        e1_duration = max(0, (now - e1.value.insertion_time) / kMicrosInSecond) * float(
-            e1.value.value_size
-        )
-        e2_duration = max(0, (now - e2.value.insertion_time) / kMicrosInSecond) * float(
-            e2.value.value_size
-        )
-        if e1_duration == e2_duration:
-            return e1.value.num_hits - e2.value.num_hits
-        if e1_duration == 0:
-            return 1
-        if e2_duration == 0:
-            return 1
-        diff = (float(e1.value.num_hits) / (float(e1_duration))) - (
-            float(e2.value.num_hits) / float(e2_duration)
-        )
-        if diff == 0:
-            return 0
-        elif diff > 0:
-            return 1
-        else:
-            return -1
-
     def prioritize_samples(self, samples, auxilliary_info):
         assert len(auxilliary_info) == 3
         now = auxilliary_info[0]
-        return sorted(samples, cmp=lambda e1, e2: self.compare(e1, e2, now))
+        inf = float("inf")
+
+        def priority(e):
+            # The entry's hit rate per byte over its lifetime in the cache.
+            # Entries with a lower priority are evicted first. An entry that
+            # was inserted just now has no lifetime yet and is never preferred
+            # for eviction.
+            value = e.value
+            duration = (now - value.insertion_time) / kMicrosInSecond * value.value_size
+            if duration <= 0:
+                return inf
+            return value.num_hits / duration
+
+        # Entries of the same priority are ordered by their number of hits;
+        # two stable sorts with scalar keys are cheaper than one sort with a
+        # tuple key.
+        samples = sorted(samples, key=lambda e: e.value.num_hits)
+        return sorted(samples, key=priority)
 
     def policy_name(self):
         return "hb"
@@ -645,8 +578,8 @@ class CostClassPolicy(Policy):
         cost_class_label = auxilliary_info[2]
         return sorted(
             samples,
-            cmp=lambda e1, e2: self.compare(
-                e1, e2, now, cost_classes, cost_class_label
+            key=cmp_to_key(
+                lambda e1, e2: self.compare(e1, e2, now, cost_classes, cost_class_label)
             ),
         )
 
@@ -673,11 +606,14 @@ class Cache:
         self.max_seen_get_id = 0
         self.retain_get_id_range = 100000
 
+    # Block keys are integers and row keys are tuples, so the two never
+    # compare equal and can share one table without building a string per
+    # access.
     def block_key(self, trace_record):
-        return "b{}".format(trace_record.block_id)
+        return trace_record.block_id
 
     def row_key(self, trace_record):
-        return "g{}-{}".format(trace_record.fd, trace_record.key_id)
+        return (trace_record.fd, trace_record.key_id)
 
     def _lookup(self, trace_record, key, hash):
         """
@@ -726,7 +662,6 @@ class Cache:
         Access a trace record. The simulator calls this function to access a
         trace record.
         """
-        assert self.used_size <= self.cache_size
         if (
             self.enable_cache_row_key > 0
             and trace_record.caller == 1
@@ -753,16 +688,17 @@ class Cache:
         self.get_id_row_key_map.pop(
             self.max_seen_get_id - self.retain_get_id_range, None
         )
-        if trace_record.get_id not in self.get_id_row_key_map:
-            self.get_id_row_key_map[trace_record.get_id] = {}
-            self.get_id_row_key_map[trace_record.get_id]["h"] = False
-        if self.get_id_row_key_map[trace_record.get_id]["h"]:
+        get_state = self.get_id_row_key_map.get(trace_record.get_id)
+        if get_state is None:
+            get_state = GetRequestState()
+            self.get_id_row_key_map[trace_record.get_id] = get_state
+        if get_state.hit:
             # We treat future accesses as hits since this get request
             # completes.
             # print("row hit 1")
             self._update_stats(trace_record.access_time, is_hit=True, miss_bytes=0)
             return
-        if row_key not in self.get_id_row_key_map[trace_record.get_id]:
+        if row_key not in get_state.inserted:
             # First time seen this key.
             is_hit = self._access_kv(
                 trace_record,
@@ -774,9 +710,9 @@ class Cache:
             inserted = False
             if trace_record.kv_size > 0:
                 inserted = True
-            self.get_id_row_key_map[trace_record.get_id][row_key] = inserted
-            self.get_id_row_key_map[trace_record.get_id]["h"] = is_hit
-        if self.get_id_row_key_map[trace_record.get_id]["h"]:
+            get_state.inserted[row_key] = inserted
+            get_state.hit = is_hit
+        if get_state.hit:
             # We treat future accesses as hits since this get request
             # completes.
             # print("row hit 2")
@@ -800,10 +736,7 @@ class Cache:
         self._update_stats(
             trace_record.access_time, is_hit, miss_bytes=trace_record.block_size
         )
-        if (
-            trace_record.kv_size > 0
-            and not self.get_id_row_key_map[trace_record.get_id][row_key]
-        ):
+        if trace_record.kv_size > 0 and not get_state.inserted[row_key]:
             # Insert the row key-value pair.
             self._access_kv(
                 trace_record,
@@ -813,24 +746,22 @@ class Cache:
                 no_insert=False,
             )
             # Mark as inserted.
-            self.get_id_row_key_map[trace_record.get_id][row_key] = True
+            get_state.inserted[row_key] = True
 
     def _access_kv(self, trace_record, key, hash, value_size, no_insert):
-        # Sanity checks.
-        assert self.used_size <= self.cache_size
         if self._lookup(trace_record, key, hash):
             # A cache hit.
             return True
-        if no_insert or value_size <= 0:
-            return False
-        # A cache miss.
-        if value_size > self.cache_size:
-            # The block is too large to fit into the cache.
+        # A cache miss. The block is not inserted if it is too large to fit
+        # into the cache.
+        if no_insert or value_size <= 0 or value_size > self.cache_size:
             return False
         self._evict(trace_record, key, hash, value_size)
         if self._should_admit(trace_record, key, hash, value_size):
             self._insert(trace_record, key, hash, value_size)
             self.used_size += value_size
+            # Sanity check. Only an insertion grows the used size.
+            assert self.used_size <= self.cache_size
         return False
 
 
@@ -914,21 +845,11 @@ class MLCache(Cache):
                 self.cost_classes[cost_class].update_on_hit(
                     trace_record, value.last_access_time
                 )
-            # Update the entry's last access time.
-            self.table.insert(
-                key,
-                hash,
-                CacheEntry(
-                    value_size=value.value_size,
-                    cf_id=value.cf_id,
-                    level=value.level,
-                    block_type=value.block_type,
-                    table_id=value.table_id,
-                    access_number=self.miss_ratio_stats.num_accesses,
-                    time_s=trace_record.access_time,
-                    num_hits=value.num_hits + 1,
-                ),
-            )
+            # Update the entry's last access time in place; the table holds a
+            # reference to 'value'.
+            value.last_access_number = self.miss_ratio_stats.num_accesses
+            value.last_access_time = trace_record.access_time
+            value.num_hits += 1
             return True
         return False
 
@@ -938,36 +859,39 @@ class MLCache(Cache):
         # entry.
         policy_index = self._select_policy(trace_record, key)
         assert policy_index < len(self.policies) and policy_index >= 0
-        self.policies[policy_index].delete(key)
-        self.policy_stats.update_metrics(trace_record.access_time, policy_index)
-        self.per_hour_policy_stats.update_metrics(
-            trace_record.access_time, policy_index
-        )
-        while self.used_size + value_size > self.cache_size:
+        policy = self.policies[policy_index]
+        table = self.table
+        access_time = trace_record.access_time
+        cost_classes = self.cost_classes
+        cost_class_label = self.cost_class_label
+        # The cache must not hold more than 'max_used_size' before inserting.
+        max_used_size = self.cache_size - value_size
+        policy.delete(key)
+        self.policy_stats.update_metrics(access_time, policy_index)
+        self.per_hour_policy_stats.update_metrics(access_time, policy_index)
+        auxilliary_info = [access_time, cost_classes, cost_class_label]
+        while self.used_size > max_used_size:
             # Randomly sample n entries.
-            samples = self.table.random_sample(kSampleSize)
-            samples = self.policies[policy_index].prioritize_samples(
-                samples,
-                [trace_record.access_time, self.cost_classes, self.cost_class_label],
-            )
+            samples = table.random_sample(kSampleSize)
+            samples = policy.prioritize_samples(samples, auxilliary_info)
             for hash_entry in samples:
-                assert self.table.delete(hash_entry.key, hash_entry.hash) is not None
-                self.used_size -= hash_entry.value.value_size
-                self.policies[policy_index].evict(
-                    key=hash_entry.key, max_size=self.table.elements
-                )
+                deleted_entry = table.delete(hash_entry.key, hash_entry.hash)
+                assert deleted_entry is not None
+                value = hash_entry.value
+                self.used_size -= value.value_size
+                policy.evict(key=hash_entry.key, max_size=table.elements)
                 # Update the entry's cost class statistics.
-                if self.cost_class_label is not None:
-                    cost_class = hash_entry.value.cost_class(self.cost_class_label)
-                    assert cost_class in self.cost_classes
-                    self.cost_classes[cost_class].remove(
-                        hash_entry.value.insertion_time,
-                        hash_entry.value.last_access_time,
+                if cost_class_label is not None:
+                    cost_class = value.cost_class(cost_class_label)
+                    assert cost_class in cost_classes
+                    cost_classes[cost_class].remove(
+                        value.insertion_time,
+                        value.last_access_time,
                         key,
-                        hash_entry.value.value_size,
-                        hash_entry.value.num_hits,
+                        value.value_size,
+                        value.num_hits,
                     )
-                if self.used_size + value_size <= self.cache_size:
+                if self.used_size <= max_used_size:
                     break
 
     def _insert(self, trace_record, key, hash, value_size):
@@ -1018,19 +942,17 @@ class ThompsonSamplingCache(MLCache):
         super(ThompsonSamplingCache, self).__init__(
             cache_size, enable_cache_row_key, policies, cost_class_label
         )
-        self._as = {}
-        self._bs = {}
-        for _i in range(len(policies)):
-            self._as = [init_a] * len(self.policies)
-            self._bs = [init_b] * len(self.policies)
+        self._as = [init_a] * len(self.policies)
+        self._bs = [init_b] * len(self.policies)
 
     def _select_policy(self, trace_record, key):
         if len(self.policies) == 1:
             return 0
-        samples = [
-            np.random.beta(self._as[x], self._bs[x]) for x in range(len(self.policies))
-        ]
-        selected_policy = max(range(len(self.policies)), key=lambda x: samples[x])
+        # One scalar draw per policy: with the handful of policies used here
+        # this is cheaper than a single np.random.beta() call on arrays.
+        beta = np.random.beta
+        samples = [beta(a, b) for a, b in zip(self._as, self._bs)]
+        selected_policy = max(range(len(samples)), key=samples.__getitem__)
         reward = self.policies[selected_policy].generate_reward(key)
         assert reward <= 1 and reward >= 0
         self._as[selected_policy] += reward
@@ -1064,36 +986,43 @@ class LinUCBCache(MLCache):
         self.th = np.zeros((len(self.policies), self.nfeatures))
         self.eps = 0.2
         self.b = np.zeros_like(self.th)
-        self.A = np.zeros((len(self.policies), self.nfeatures, self.nfeatures))
-        self.A_inv = np.zeros((len(self.policies), self.nfeatures, self.nfeatures))
-        for i in range(len(self.policies)):
-            self.A[i] = np.identity(self.nfeatures)
+        # The inverse of each policy's design matrix A, which starts as the
+        # identity. Only the inverse is kept since it is all that is needed to
+        # score policies and it is updated directly as A grows.
+        self.A_inv = np.tile(np.identity(self.nfeatures), (len(self.policies), 1, 1))
         self.th_hat = np.zeros_like(self.th)
         self.p = np.zeros(len(self.policies))
         self.alph = 0.2
+        self.x_i = np.zeros(self.nfeatures)  # The current context vector
 
     def _select_policy(self, trace_record, key):
         if len(self.policies) == 1:
             return 0
-        x_i = np.zeros(self.nfeatures)  # The current context vector
+        x_i = self.x_i
         x_i[0] = trace_record.block_type
         x_i[1] = trace_record.level
         x_i[2] = trace_record.cf_id
-        p = np.zeros(len(self.policies))
-        for a in range(len(self.policies)):
-            self.th_hat[a] = self.A_inv[a].dot(self.b[a])
-            ta = x_i.dot(self.A_inv[a]).dot(x_i)
-            a_upper_ci = self.alph * np.sqrt(ta)
-            a_mean = self.th_hat[a].dot(x_i)
-            p[a] = a_mean + a_upper_ci
-        p = p + (np.random.random(len(p)) * 0.000001)
+        # Score all policies with batched operations instead of a Python loop
+        # over them since the matrices are tiny and the per-call overhead of
+        # numpy dominates.
+        np.einsum("aij,aj->ai", self.A_inv, self.b, out=self.th_hat)
+        ta = self.A_inv.dot(x_i).dot(x_i)
+        p = self.p
+        np.sqrt(ta, out=p)
+        p *= self.alph
+        p += self.th_hat.dot(x_i)
+        # Ties are broken in favor of the first policy. A policy that is
+        # selected gets a smaller confidence bound afterwards, so tied
+        # policies are still explored in turn.
         selected_policy = p.argmax()
         reward = self.policies[selected_policy].generate_reward(key)
         assert reward <= 1 and reward >= 0
-        self.A[selected_policy] += np.outer(x_i, x_i)
         self.b[selected_policy] += reward * x_i
-        self.A_inv[selected_policy] = np.linalg.inv(self.A[selected_policy])
-        del x_i
+        # A += x_i x_i^T is a rank-one update, so apply the Sherman-Morrison
+        # formula to A's inverse instead of inverting A again.
+        A_inv = self.A_inv[selected_policy]
+        u = A_inv.dot(x_i)
+        A_inv -= np.outer(u, u) / (1.0 + x_i.dot(u))
         return selected_policy
 
     def cache_name(self):
@@ -1111,21 +1040,21 @@ class OPTCacheEntry:
     access is the furthest in the future is ordered before other entries.
     """
 
+    __slots__ = ("key", "next_access_seq_no", "value_size", "heap_index")
+
     def __init__(self, key, next_access_seq_no, value_size):
         self.key = key
         self.next_access_seq_no = next_access_seq_no
         self.value_size = value_size
-        self.is_removed = False
+        self.heap_index = -1
 
-    def __cmp__(self, other):
+    def __lt__(self, other):
         if other.next_access_seq_no != self.next_access_seq_no:
-            return other.next_access_seq_no - self.next_access_seq_no
-        return self.value_size - other.value_size
+            return self.next_access_seq_no > other.next_access_seq_no
+        return self.value_size < other.value_size
 
     def __repr__(self):
-        return "({} {} {} {})".format(
-            self.key, self.next_access_seq_no, self.value_size, self.is_removed
-        )
+        return "({} {} {})".format(self.key, self.next_access_seq_no, self.value_size)
 
 
 class PQTable:
@@ -1134,38 +1063,83 @@ class PQTable:
     """
 
     def __init__(self):
-        # A list of entries arranged in a heap sorted based on the entry custom
-        # implementation of __cmp__
+        # A list of entries arranged in a binary heap sorted based on the entry
+        # custom implementation of __lt__. Each entry records its position in
+        # the heap so that updating the priority of a key replaces its entry in
+        # place and the heap never holds more entries than the table.
         self.pq = []
         self.table = {}
 
     def pqinsert(self, entry):
         "Add a new key or update the priority of an existing key"
-        # Remove the entry from the table first.
-        removed_entry = self.table.pop(entry.key, None)
-        if removed_entry:
-            # Mark as removed since there is no 'remove' API in heappq.
-            # Instead, an entry in pq is removed lazily when calling pop.
-            removed_entry.is_removed = True
+        pq = self.pq
+        removed_entry = self.table.get(entry.key)
         self.table[entry.key] = entry
-        heapq.heappush(self.pq, entry)
+        if removed_entry is None:
+            entry.heap_index = len(pq)
+            pq.append(entry)
+            self._sift_up(entry.heap_index)
+            return None
+        index = removed_entry.heap_index
+        entry.heap_index = index
+        pq[index] = entry
+        if entry < removed_entry:
+            self._sift_up(index)
+        else:
+            self._sift_down(index)
         return removed_entry
 
     def pqpop(self):
-        while self.pq:
-            entry = heapq.heappop(self.pq)
-            if not entry.is_removed:
-                del self.table[entry.key]
-                return entry
-        return None
+        pq = self.pq
+        if not pq:
+            return None
+        entry = pq[0]
+        last = pq.pop()
+        if pq:
+            last.heap_index = 0
+            pq[0] = last
+            self._sift_down(0)
+        del self.table[entry.key]
+        return entry
 
     def pqpeek(self):
-        while self.pq:
-            entry = self.pq[0]
-            if not entry.is_removed:
-                return entry
-            heapq.heappop(self.pq)
-        return
+        if not self.pq:
+            return None
+        return self.pq[0]
+
+    def _sift_up(self, index):
+        pq = self.pq
+        entry = pq[index]
+        while index > 0:
+            parent_index = (index - 1) >> 1
+            parent = pq[parent_index]
+            if not entry < parent:
+                break
+            pq[index] = parent
+            parent.heap_index = index
+            index = parent_index
+        pq[index] = entry
+        entry.heap_index = index
+
+    def _sift_down(self, index):
+        pq = self.pq
+        size = len(pq)
+        entry = pq[index]
+        while True:
+            child_index = 2 * index + 1
+            if child_index >= size:
+                break
+            right_index = child_index + 1
+            if right_index < size and pq[right_index] < pq[child_index]:
+                child_index = right_index
+            child = pq[child_index]
+            if not child < entry:
+                break
+            pq[index] = child
+            child.heap_index = index
+            index = child_index
+        pq[index] = entry
+        entry.heap_index = index
 
     def __contains__(self, k):
         return k in self.table
@@ -1241,21 +1215,21 @@ class GDSizeEntry:
     A cache entry for the greedy dual size replacement policy.
     """
 
+    __slots__ = ("key", "value_size", "priority", "heap_index")
+
     def __init__(self, key, value_size, priority):
         self.key = key
         self.value_size = value_size
         self.priority = priority
-        self.is_removed = False
+        self.heap_index = -1
 
-    def __cmp__(self, other):
+    def __lt__(self, other):
         if other.priority != self.priority:
-            return self.priority - other.priority
-        return self.value_size - other.value_size
+            return self.priority < other.priority
+        return self.value_size < other.value_size
 
     def __repr__(self):
-        return "({} {} {} {})".format(
-            self.key, self.next_access_seq_no, self.value_size, self.is_removed
-        )
+        return "({} {} {})".format(self.key, self.priority, self.value_size)
 
 
 class GDSizeCache(Cache):
@@ -1311,21 +1285,21 @@ class GDSizeCache(Cache):
 
 
 class Deque:
-    """A Deque class facilitates the implementation of LRU and ARC."""
+    """A Deque class facilitates the implementation of ARC."""
 
     def __init__(self):
         self.od = OrderedDict()
 
     def appendleft(self, k):
-        if k in self.od:
-            del self.od[k]
-        self.od[k] = None
+        # Adds k to the front of the deque, moving it there if it is present.
+        od = self.od
+        od[k] = None
+        od.move_to_end(k)
 
     def pop(self):
-        item = self.od.popitem(last=False) if self.od else None
-        if item is not None:
-            return item[0]
-        return None
+        if not self.od:
+            return None
+        return self.od.popitem(last=False)[0]
 
     def remove(self, k):
         del self.od[k]
@@ -1363,7 +1337,8 @@ class ARCCache(Cache):
     def __init__(self, cache_size, enable_cache_row_key):
         super(ARCCache, self).__init__(cache_size, enable_cache_row_key)
         self.table = {}
-        self.c = cache_size / 16 * 1024  # Number of elements in the cache.
+        # Number of elements in the cache.
+        self.c = max(1, int(cache_size // (16 * 1024)))
         self.p = 0  # Target size for the list T1
         # L1: only once recently
         self.t1 = Deque()  # T1: recent cache entries
@@ -1384,8 +1359,7 @@ class ARCCache(Cache):
                 else:
                     old = self.t1.pop()
                     self.b1.appendleft(old)
-            self.used_size -= self.table[old].value_size
-            del self.table[old]
+            self.used_size -= self.table.pop(old).value_size
 
     def _lookup(self, trace_record, key, hash):
         # Case I: key is in T1 or T2.
@@ -1396,7 +1370,6 @@ class ARCCache(Cache):
             return True
 
         if key in self.t2:
-            self.t2.remove(key)
             self.t2.appendleft(key)
             return True
         return False
@@ -1405,7 +1378,7 @@ class ARCCache(Cache):
         # Case II: key is in B1
         #   Move x from B1 to the MRU position in T2 (also fetch x to the cache).
         if key in self.b1:
-            self.p = min(self.c, self.p + max(len(self.b2) / len(self.b1), 1))
+            self.p = min(self.c, self.p + max(len(self.b2) // len(self.b1), 1))
             self._replace(key, value_size)
             self.b1.remove(key)
             self.t2.appendleft(key)
@@ -1414,7 +1387,7 @@ class ARCCache(Cache):
         # Case III: key is in B2
         #   Move x from B2 to the MRU position in T2 (also fetch x to the cache).
         if key in self.b2:
-            self.p = max(0, self.p - max(len(self.b1) / len(self.b2), 1))
+            self.p = max(0, self.p - max(len(self.b1) // len(self.b2), 1))
             self._replace(key, value_size)
             self.b2.remove(key)
             self.t2.appendleft(key)
@@ -1460,8 +1433,9 @@ class LRUCache(Cache):
 
     def __init__(self, cache_size, enable_cache_row_key):
         super(LRUCache, self).__init__(cache_size, enable_cache_row_key)
-        self.table = {}
-        self.lru = Deque()
+        # The table also keeps the LRU order: the least recently used entry
+        # comes first.
+        self.table = OrderedDict()
 
     def cache_name(self):
         if self.enable_cache_row_key:
@@ -1472,15 +1446,13 @@ class LRUCache(Cache):
         if key not in self.table:
             return False
         # A cache hit. Update LRU queue.
-        self.lru.remove(key)
-        self.lru.appendleft(key)
+        self.table.move_to_end(key)
         return True
 
     def _evict(self, trace_record, key, hash, value_size):
         while self.used_size + value_size > self.cache_size:
-            evict_key = self.lru.pop()
-            self.used_size -= self.table[evict_key].value_size
-            del self.table[evict_key]
+            _, evict_entry = self.table.popitem(last=False)
+            self.used_size -= evict_entry.value_size
 
     def _insert(self, trace_record, key, hash, value_size):
         self.table[key] = CacheEntry(
@@ -1492,7 +1464,6 @@ class LRUCache(Cache):
             0,
             trace_record.access_time,
         )
-        self.lru.appendleft(key)
 
     def _should_admit(self, trace_record, key, hash, value_size):
         return True
@@ -1639,8 +1610,12 @@ class BlockAccessTimeline:
     BlockAccessTimeline stores all accesses of a block.
     """
 
+    __slots__ = ("accesses", "current_access_index")
+
     def __init__(self):
-        self.accesses = []
+        # The access sequence numbers of the block packed as 64-bit integers
+        # since the accesses of every block in the trace are kept in memory.
+        self.accesses = array("q")
         self.current_access_index = 1
 
     def get_next_access(self):
@@ -1657,12 +1632,6 @@ def percent(e1, e2):
     return float(e1) * 100.0 / float(e2)
 
 
-def is_target_cf(access_cf, target_cf_name):
-    if target_cf_name == "all":
-        return True
-    return access_cf == target_cf_name
-
-
 def run(
     trace_file_path,
     cache_type,
@@ -1681,6 +1650,9 @@ def run(
     is_opt_cache = False
     if cache.cache_name() == "Belady MIN (opt)":
         is_opt_cache = True
+    # Whether only the accesses of the column family 'target_cf_name' are
+    # replayed. This is decided once instead of for every trace record.
+    filter_cf = target_cf_name != "all"
 
     block_access_timelines = {}
     num_no_inserts = 0
@@ -1699,22 +1671,26 @@ def run(
                     and access_seq_no > max_accesses_to_process
                 ):
                     break
-                ts = line.split(",")
-                timestamp = int(ts[0])
+                # Only the first ten fields are needed here, so leave the rest
+                # of the line unsplit.
+                ts = line.split(",", 10)
                 cf_name = ts[5]
-                if not is_target_cf(cf_name, target_cf_name):
+                if filter_cf and cf_name != target_cf_name:
                     continue
+                timestamp = int(ts[0])
                 if trace_start_time == 0:
                     trace_start_time = timestamp
                 trace_duration = timestamp - trace_start_time
                 block_id = int(ts[1])
                 block_size = int(ts[3])
                 no_insert = int(ts[9])
-                if block_id not in block_access_timelines:
-                    block_access_timelines[block_id] = BlockAccessTimeline()
+                timeline = block_access_timelines.get(block_id)
+                if timeline is None:
+                    timeline = BlockAccessTimeline()
+                    block_access_timelines[block_id] = timeline
                     if block_size == 0:
                         num_blocks_with_no_size += 1
-                block_access_timelines[block_id].accesses.append(access_seq_no)
+                timeline.accesses.append(access_seq_no)
                 access_seq_no += 1
                 if no_insert == 1:
                     num_no_inserts += 1
@@ -1755,91 +1731,83 @@ def run(
     trace_start_time = 0
     trace_duration = 0
     print("Running simulated {} cache on block traces.".format(cache.cache_name()))
-    with open(trace_file_path, "r") as trace_file:
-        for line in trace_file:
-            if (
-                max_accesses_to_process != -1
-                and access_seq_no > max_accesses_to_process
-            ):
-                break
-            if access_seq_no % 1000000 == 0:
-                # Force a python gc periodically to reduce memory usage.
-                gc.collect()
-            ts = line.split(",")
-            timestamp = int(ts[0])
-            cf_name = ts[5]
-            if not is_target_cf(cf_name, target_cf_name):
-                continue
-            if trace_start_time == 0:
-                trace_start_time = timestamp
-            trace_duration = timestamp - trace_start_time
-            if (
-                not warmup_complete
-                and warmup_seconds > 0
-                and trace_duration > warmup_seconds * 1000000
-            ):
-                cache.miss_ratio_stats.reset_counter()
-                warmup_complete = True
-            next_access_seq_no = 0
-            block_id = int(ts[1])
-            if is_opt_cache:
-                next_access_seq_no = block_access_timelines[block_id].get_next_access()
-            record = TraceRecord(
-                access_time=int(ts[0]),
-                block_id=int(ts[1]),
-                block_type=int(ts[2]),
-                block_size=int(ts[3]),
-                cf_id=int(ts[4]),
-                cf_name=ts[5],
-                level=int(ts[6]),
-                fd=int(ts[7]),
-                caller=int(ts[8]),
-                no_insert=int(ts[9]),
-                get_id=int(ts[10]),
-                key_id=int(ts[11]),
-                kv_size=int(ts[12]),
-                is_hit=int(ts[13]),
-                referenced_key_exist_in_block=int(ts[14]),
-                num_keys_in_block=int(ts[15]),
-                table_id=int(ts[16]),
-                seq_number=int(ts[17]),
-                block_key_size=int(ts[18]),
-                key_size=int(ts[19]),
-                block_offset_in_file=int(ts[20]),
-                next_access_seq_no=next_access_seq_no,
-            )
-            trace_miss_ratio_stats.update_metrics(
-                record.access_time, is_hit=record.is_hit, miss_bytes=record.block_size
-            )
-            cache.access(record)
-            access_seq_no += 1
-            del record
-            del ts
-            if access_seq_no % 100 != 0:
-                continue
-            # Report progress every 10 seconds.
-            now = time.time()
-            if now - start_time > time_interval * 10:
-                print(
-                    "Take {} seconds to process {} trace records with trace "
-                    "duration of {} seconds. Throughput: {} records/second. "
-                    "Trace miss ratio {}".format(
-                        now - start_time,
-                        access_seq_no,
-                        trace_duration / 1000000,
-                        access_seq_no / (now - start_time),
-                        trace_miss_ratio_stats.miss_ratio(),
-                    )
+    # The replay loop does not create reference cycles, so the cyclic garbage
+    # collector is disabled while it runs instead of repeatedly walking the
+    # millions of live cache entries.
+    gc.disable()
+    try:
+        with open(trace_file_path, "r") as trace_file:
+            for line in trace_file:
+                if (
+                    max_accesses_to_process != -1
+                    and access_seq_no > max_accesses_to_process
+                ):
+                    break
+                ts = line.split(",")
+                timestamp = int(ts[0])
+                cf_name = ts[5]
+                if filter_cf and cf_name != target_cf_name:
+                    continue
+                if trace_start_time == 0:
+                    trace_start_time = timestamp
+                trace_duration = timestamp - trace_start_time
+                if (
+                    not warmup_complete
+                    and warmup_seconds > 0
+                    and trace_duration > warmup_seconds * 1000000
+                ):
+                    cache.miss_ratio_stats.reset_counter()
+                    warmup_complete = True
+                next_access_seq_no = 0
+                block_id = int(ts[1])
+                if is_opt_cache:
+                    timeline = block_access_timelines[block_id]
+                    next_access_seq_no = timeline.get_next_access()
+                # The trace fields are in the same order as the arguments of
+                # TraceRecord, from access_time to block_offset_in_file. All of
+                # them are integers except for cf_name.
+                record = TraceRecord(
+                    timestamp,
+                    block_id,
+                    *map(int, ts[2:5]),
+                    cf_name,
+                    *map(int, ts[6:21]),
+                    next_access_seq_no,
                 )
-                time_interval += 1
-                print(
-                    "{},0,0,{},{},{}".format(
-                        cache_type,
-                        cache.cache_size,
-                        cache.miss_ratio_stats.miss_ratio(),
-                        cache.miss_ratio_stats.num_accesses,
-                    )
+                trace_miss_ratio_stats.update_metrics(
+                    record.access_time,
+                    is_hit=record.is_hit,
+                    miss_bytes=record.block_size,
                 )
+                cache.access(record)
+                access_seq_no += 1
+                if access_seq_no % 100 != 0:
+                    continue
+                # Report progress every 10 seconds.
+                now = time.time()
+                if now - start_time > time_interval * 10:
+                    print(
+                        "Take {} seconds to process {} trace records with trace "
+                        "duration of {} seconds. Throughput: {} records/second. "
+                        "Trace miss ratio {}".format(
+                            now - start_time,
+                            access_seq_no,
+                            trace_duration / 1000000,
+                            access_seq_no / (now - start_time),
+                            trace_miss_ratio_stats.miss_ratio(),
+                        )
+                    )
+                    time_interval += 1
+                    print(
+                        "{},0,0,{},{},{}".format(
+                            cache_type,
+                            cache.cache_size,
+                            cache.miss_ratio_stats.miss_ratio(),
+                            cache.miss_ratio_stats.num_accesses,
+                        )
+                    )
+    finally:
+        gc.enable()
     now = time.time()
     print(
         "Take {} seconds to process {} trace records with trace duration of {} "
@@ -104,18 +104,18 @@ def assert_metrics(cache, expected_value, expected_value_size=1, custom_hashtabl
     )
     for expeceted_k in expected_value[3]:
         if custom_hashtable:
-            val = cache.table.lookup("b{}".format(expeceted_k), expeceted_k)
+            val = cache.table.lookup(expeceted_k, expeceted_k)
         else:
-            val = cache.table["b{}".format(expeceted_k)]
+            val = cache.table[expeceted_k]
         assert val is not None, "Expected {} Actual: Not Exist {}, Table: {}".format(
             expeceted_k, expected_value, cache.table
         )
         assert val.value_size == expected_value_size
     for expeceted_k in expected_value[4]:
         if custom_hashtable:
-            val = cache.table.lookup("g0-{}".format(expeceted_k), expeceted_k)
+            val = cache.table.lookup((0, expeceted_k), expeceted_k)
         else:
-            val = cache.table["g0-{}".format(expeceted_k)]
+            val = cache.table[(0, expeceted_k)]
         assert val is not None
         assert val.value_size == expected_value_size
 